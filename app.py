@@ -2,11 +2,14 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from flask import Flask, session, render_template, send_from_directory
+from flask import Flask, session, render_template, send_from_directory, g, abort
 from flask_migrate import Migrate
+from flask_compress import Compress
+from werkzeug.security import safe_join
 from models import db, Product, User, Order, OrderItem
 from config import Config
 from utils.local_storage import local_storage_service
+from utils.json_provider import OrjsonProvider
 import logging
 from datetime import timedelta
 import os
@@ -23,6 +26,7 @@ from routes.payment import payment_bp
 
 app = Flask(__name__)
 app.config.from_object(Config)
+app.json = OrjsonProvider(app)
 
 # Enhanced session configuration for development stability
 app.config['SESSION_COOKIE_SECURE'] = False  # Allow HTTP in development
@@ -33,12 +37,18 @@ app.config['SESSION_COOKIE_NAME'] = 'flash_studio_session'
 
 db.init_app(app)
 migrate = Migrate(app, db)
+Compress(app)
 
 ## --- Storage Backend (Local Only) ---
 logging.info("[storage] Using local storage backend")
 app.extensions['active_storage'] = local_storage_service
 app.config['ACTIVE_STORAGE_BACKEND'] = 'local'
 
+# Liveness probe, registered ahead of the blueprints
+@app.get("/healthz")
+def healthz():
+    return {"ok": True}, 200
+
 # Register blueprints
 app.register_blueprint(public_bp)
 app.register_blueprint(admin_bp)
@@ -55,7 +65,17 @@ def media(filename):
     """Serve media files from the uploads directory with proper MIME types"""
     # Ensure proper MIME types for video files
     mimetype, _ = mimetypes.guess_type(filename)
-    response = send_from_directory('static/uploads', filename)
+
+    accel_prefix = app.config.get('MEDIA_ACCEL_REDIRECT_PREFIX')
+    if accel_prefix:
+        # nginx streams the file itself (sendfile) from its internal location
+        internal_path = safe_join(accel_prefix, filename)
+        if internal_path is None:
+            abort(404)
+        response = app.response_class(mimetype=mimetype or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = internal_path
+    else:
+        response = send_from_directory('static/uploads', filename)
     
     if mimetype and mimetype.startswith('video'):
         response.headers['Accept-Ranges'] = 'bytes'
@@ -64,27 +84,40 @@ def media(filename):
     return response
 
 # Context processor for templates
+_UNSET = object()
+
 @app.context_processor
 def inject_user():
-    """Inject current user and admin status into template context"""
-    current_user = None
+    """Inject current user and admin status into template context.
+    The user lookup is cached on flask.g so every template/partial rendered
+    during a request shares a single query.
+    """
+    current_user = getattr(g, '_current_user', _UNSET)
+    if current_user is _UNSET:
+        current_user = None
+        if session.get("user_id"):
+            current_user = db.session.get(User, session["user_id"])
+        g._current_user = current_user
     current_admin = None
-    if session.get("user_id"):
-        current_user = db.session.get(User, session["user_id"])
     if session.get("admin") or session.get("admin_logged_in"):
         current_admin = True
     return dict(current_user=current_user, current_admin=current_admin)
 
 # Error handlers
+# Bodies are encoded once at import; 404s in particular are frequent from bot scans
+_HTML_HEADERS = {'Content-Type': 'text/html; charset=utf-8'}
+_NOT_FOUND_BODY = b'<h1>Page Not Found</h1><p>The page you are looking for does not exist.</p>'
+_INTERNAL_ERROR_BODY = b'<h1>Internal Server Error</h1><p>Something went wrong.</p>'
+
 @app.errorhandler(404)
 def not_found_error(error):
-    return '<h1>Page Not Found</h1><p>The page you are looking for does not exist.</p>', 404
+    return _NOT_FOUND_BODY, 404, _HTML_HEADERS
 
 @app.errorhandler(500)
 def internal_error(error):
     """Handle internal server errors"""
     db.session.rollback()
-    return '<h1>Internal Server Error</h1><p>Something went wrong.</p>', 500
+    return _INTERNAL_ERROR_BODY, 500, _HTML_HEADERS
 
 def init_db():
     """Initialize database with sample data if empty"""
@@ -139,9 +172,7 @@ def init_db():
                 )
             ]
             
-            for product in sample_products:
-                db.session.add(product)
-            
+            db.session.add_all(sample_products)
             db.session.commit()
 
 if __name__ == "__main__":
@@ -152,7 +183,3 @@ if __name__ == "__main__":
     debug_mode = os.getenv('FLASK_DEBUG', 'False').lower() in ('true', '1', 'yes')
     app.run(debug=debug_mode, host='127.0.0.1', port=5001)
 
-@app.get("/healthz") 
-def healthz(): 
-    return {"ok": True}, 200
-
@@ -10,6 +10,15 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connection pool for server databases; SQLite keeps SQLAlchemy's own pool defaults
+    SQLALCHEMY_ENGINE_OPTIONS = {} if SQLALCHEMY_DATABASE_URI.startswith("sqlite") else {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 10)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 5)),
+        "pool_timeout": 30,
+        "pool_recycle": 1800,  # recycle before server-side idle timeouts drop the connection
+        "pool_pre_ping": True,
+    }
+
     # Admin credentials
     ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
     ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin")
@@ -17,6 +26,22 @@ class Config:
     # Storage backend: local only
     STORAGE_BACKEND = "local"
 
+    # Upload limits: Flask rejects larger request bodies with 413 before they are parsed
+    MAX_CONTENT_LENGTH = int(os.getenv("MAX_CONTENT_LENGTH", 200 * 1024 * 1024))  # 200 MiB
+    UPLOAD_BATCH_MAX_FILES = int(os.getenv("UPLOAD_BATCH_MAX_FILES", 20))
+
+    # Hand /media file transfers to the front-end web server instead of streaming through Python.
+    # USE_X_SENDFILE is Flask's Apache/lighttpd switch; MEDIA_ACCEL_REDIRECT_PREFIX is an nginx
+    # internal location aliased to static/uploads, e.g. "/_protected/".
+    USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "False").lower() in ("true", "1", "yes")
+    MEDIA_ACCEL_REDIRECT_PREFIX = os.getenv("MEDIA_ACCEL_REDIRECT_PREFIX")
+
+    # Response compression (Flask-Compress): Brotli when the client accepts it, else gzip.
+    # Only text types are compressed; images/video are already compressed.
+    COMPRESS_ALGORITHM = ["br", "gzip"]
+    COMPRESS_MIMETYPES = ["text/html", "text/css", "text/javascript", "application/javascript", "application/json"]
+    COMPRESS_MIN_SIZE = 500
+
     # Payments configuration
     PAYMENTS_PROVIDER = os.getenv("PAYMENTS_PROVIDER", "stripe")  # 'dummy' or 'stripe'
     
@@ -0,0 +1,98 @@
+"""Add analytics/listing indexes to an existing database
+
+db.create_all() only creates indexes together with new tables, so databases
+created before these indexes were declared in models.py never get them.
+This script adds them in place; it is safe to run more than once.
+"""
+
+import os
+import sqlite3
+
+# (index name, table, columns) - keep in sync with __table_args__ in models.py
+INDEXES = [
+    ('ix_order_status_created', 'order', 'status, created_at'),
+    ('ix_order_user', 'order', 'user_id'),
+    ('ix_order_item_order', 'order_item', 'order_id'),
+    ('ix_quote_status', 'quote_request', 'status'),
+    ('ix_quote_created', 'quote_request', 'created_at'),
+    ('ix_booking_status_date', 'booking', 'status, booking_date'),
+    ('ix_booking_created', 'booking', 'created_at'),
+]
+
+def run_migration(database_path='instance/filmcompany.db'):
+    """
+    Create any missing indexes on the existing tables
+    """
+
+    print(f"🔄 Starting index migration on {database_path}")
+
+    if not os.path.exists(database_path):
+        print(f"❌ Database not found at {database_path}")
+        return False
+
+    conn = None
+    try:
+        conn = sqlite3.connect(database_path)
+        cursor = conn.cursor()
+
+        for name, table, columns in INDEXES:
+            print(f"📊 {name} on {table} ({columns})")
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({columns})')
+
+        conn.commit()
+        print("💾 Index migration committed successfully!")
+        return True
+
+    except sqlite3.Error as e:
+        print(f"❌ Database error: {e}")
+        if conn:
+            conn.rollback()
+        return False
+
+    finally:
+        if conn:
+            conn.close()
+
+def verify_migration(database_path='instance/filmcompany.db'):
+    """
+    Verify that every expected index exists
+    """
+
+    print(f"\n🔍 Verifying migration...")
+
+    conn = None
+    try:
+        conn = sqlite3.connect(database_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='index'")
+        found = {row[0] for row in cursor.fetchall()}
+
+        missing = [name for name, _, _ in INDEXES if name not in found]
+        if missing:
+            print(f"❌ Missing indexes: {', '.join(missing)}")
+            return False
+
+        print("✅ All indexes present!")
+        return True
+
+    except sqlite3.Error as e:
+        print(f"❌ Verification error: {e}")
+        return False
+
+    finally:
+        if conn:
+            conn.close()
+
+def main():
+    print("🚀 FlashStudio Index Migration")
+    print("=" * 50)
+
+    database_path = 'instance/filmcompany.db'
+
+    if run_migration(database_path) and verify_migration(database_path):
+        print("\n🎉 Index migration completed successfully!")
+    else:
+        print("\n❌ Index migration failed!")
+
+if __name__ == '__main__':
+    main()
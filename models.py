@@ -1,11 +1,29 @@
 from datetime import datetime, timedelta, date
 from flask_sqlalchemy import SQLAlchemy
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import func, and_, or_
-import json
+from sqlalchemy import func, and_, or_, case, true, event, select, union_all, literal, null, cast, desc
+import copy
+import functools
+import orjson
+import threading
+import time
 
 db = SQLAlchemy()
 
+# Product customization options used when a product doesn't define its own
+DEFAULT_SIZE_OPTIONS = ("20cm x 30cm", "40cm x 60cm")
+DEFAULT_FRAME_OPTIONS = ("No frame", "Black", "White")
+
+def _options_list(raw, defaults):
+    """Decode a JSON array options column, falling back to defaults if unset or not a list"""
+    if not raw:
+        return list(defaults)
+    try:
+        options = orjson.loads(raw)
+    except (ValueError, TypeError):
+        return list(defaults)
+    return options if isinstance(options, list) else list(defaults)
+
 class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
@@ -55,35 +73,30 @@ class Product(db.Model):
     @property
     def size_options_list(self):
         """Get available sizes as a list"""
-        if not self.available_sizes:
-            return ["20cm x 30cm", "40cm x 60cm"]  # Default options
-        try:
-            return json.loads(self.available_sizes)
-        except:
-            return ["20cm x 30cm", "40cm x 60cm"]  # Fallback to defaults
+        return _options_list(self.available_sizes, DEFAULT_SIZE_OPTIONS)
     
     @size_options_list.setter
     def size_options_list(self, value):
         """Set available sizes from a list"""
-        self.available_sizes = json.dumps(value) if value else None
+        self.available_sizes = orjson.dumps(value).decode() if value else None
     
     @property
     def frame_options_list(self):
         """Get available frames as a list"""
-        if not self.available_frames:
-            return ["No frame", "Black", "White"]  # Default options
-        try:
-            return json.loads(self.available_frames)
-        except:
-            return ["No frame", "Black", "White"]  # Fallback to defaults
+        return _options_list(self.available_frames, DEFAULT_FRAME_OPTIONS)
     
     @frame_options_list.setter  
     def frame_options_list(self, value):
         """Set available frames from a list"""
-        self.available_frames = json.dumps(value) if value else None
+        self.available_frames = orjson.dumps(value).decode() if value else None
         return bool(self.video_key)
 
 class Order(db.Model):
+    __table_args__ = (
+        db.Index('ix_order_status_created', 'status', 'created_at'),
+        db.Index('ix_order_user', 'user_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(255), nullable=False)
     amount_cents = db.Column(db.Integer, nullable=False)
@@ -115,6 +128,10 @@ class Order(db.Model):
         return len(self.items) > 0
 
 class OrderItem(db.Model):
+    __table_args__ = (
+        db.Index('ix_order_item_order', 'order_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey("order.id"), nullable=False)
     product_id = db.Column(db.Integer, db.ForeignKey("product.id"), nullable=False)
@@ -137,6 +154,11 @@ class User(db.Model):
         return check_password_hash(self.password_hash, password)
 
 class QuoteRequest(db.Model):
+    __table_args__ = (
+        db.Index('ix_quote_status', 'status'),
+        db.Index('ix_quote_created', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     email = db.Column(db.String(255), nullable=False)
@@ -187,6 +209,11 @@ CORPORATE_CATEGORIES = [
 ]
 
 class Booking(db.Model):
+    __table_args__ = (
+        db.Index('ix_booking_status_date', 'status', 'booking_date'),
+        db.Index('ix_booking_created', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(255), nullable=False)
     email = db.Column(db.String(255), nullable=False)
@@ -233,11 +260,46 @@ class Availability(db.Model):
     notes = db.Column(db.String(255))  # Reason for unavailability
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+# Analytics results are reused for a short while; any write to a table they read clears them.
+# The cache is per process: a write only clears it in the worker that made it, so other
+# gunicorn workers can serve results up to ANALYTICS_RESULT_TTL old. Kept short for that reason.
+ANALYTICS_RESULT_TTL = 15  # seconds
+_ANALYTICS_CACHE_MAX = 64
+_analytics_cache = {}
+_analytics_cache_lock = threading.Lock()
+
+def _ttl_cached(fn):
+    """Memoize an Analytics query for ANALYTICS_RESULT_TTL seconds, keyed by its arguments"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+        now = time.monotonic()
+        hit = _analytics_cache.get(key)
+        if hit is not None and hit[0] > now:
+            return copy.deepcopy(hit[1])
+        
+        value = fn(*args, **kwargs)
+        with _analytics_cache_lock:
+            if len(_analytics_cache) >= _ANALYTICS_CACHE_MAX:
+                _analytics_cache.clear()
+            _analytics_cache[key] = (now + ANALYTICS_RESULT_TTL, copy.deepcopy(value))
+        return value
+    return wrapper
+
+def clear_analytics_cache(*_):
+    with _analytics_cache_lock:
+        _analytics_cache.clear()
+
+for _model in (Order, QuoteRequest, Booking):
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, clear_analytics_cache)
+
 # Analytics Class
 class Analytics:
     """Analytics helper class for dashboard metrics"""
     
     @staticmethod
+    @_ttl_cached
     def get_dashboard_stats(date_range=30):
         """Get key dashboard statistics"""
         # Ensure date_range is an integer
@@ -249,33 +311,42 @@ class Analytics:
         end_date = date.today()
         start_date = end_date - timedelta(days=date_range)
         
-        # Revenue stats
-        total_revenue = db.session.query(func.sum(Order.amount_cents)).filter(
-            Order.status == 'paid'
-        ).scalar() or 0
+        # Every dashboard figure comes back in one row from one statement: each
+        # table is aggregated once (single-row subquery) and the rows are joined
+        revenue = db.session.query(
+            func.coalesce(func.sum(Order.amount_cents), 0).label('total_revenue'),
+            func.coalesce(func.sum(case((Order.created_at >= start_date, Order.amount_cents))), 0).label('period_revenue')
+        ).filter(Order.status == 'paid').subquery()
         
-        period_revenue = db.session.query(func.sum(Order.amount_cents)).filter(
-            and_(Order.status == 'paid', Order.created_at >= start_date)
-        ).scalar() or 0
+        quotes = db.session.query(
+            func.count(QuoteRequest.id).label('total_quotes'),
+            func.count(case((QuoteRequest.status == 'pending', 1))).label('pending_quotes'),
+            func.count(case((QuoteRequest.status == 'quoted', 1))).label('quoted_quotes'),
+            func.count(case((QuoteRequest.created_at >= start_date, 1))).label('period_quotes'),
+            func.avg(QuoteRequest.quote_amount).label('avg_quote_amount')
+        ).subquery()
         
-        # Quote stats
-        total_quotes = QuoteRequest.query.count()
-        pending_quotes = QuoteRequest.query.filter(QuoteRequest.status == 'pending').count()
+        bookings = db.session.query(
+            func.count(Booking.id).label('total_bookings'),
+            func.count(case((Booking.status == 'confirmed', 1))).label('confirmed_bookings'),
+            func.count(case((Booking.created_at >= start_date, 1))).label('period_bookings')
+        ).subquery()
         
-        period_quotes = QuoteRequest.query.filter(
-            QuoteRequest.created_at >= start_date
-        ).count()
+        stats = db.session.query(revenue, quotes, bookings).select_from(
+            revenue.join(quotes, true()).join(bookings, true())
+        ).one()
         
-        # Booking stats
-        total_bookings = Booking.query.count()
-        confirmed_bookings = Booking.query.filter(Booking.status == 'confirmed').count()
-        
-        period_bookings = Booking.query.filter(
-            Booking.created_at >= start_date
-        ).count()
+        total_revenue = stats.total_revenue
+        period_revenue = stats.period_revenue
+        total_quotes = stats.total_quotes
+        pending_quotes = stats.pending_quotes
+        period_quotes = stats.period_quotes
+        total_bookings = stats.total_bookings
+        confirmed_bookings = stats.confirmed_bookings
+        period_bookings = stats.period_bookings
         
         # Conversion rate
-        quoted_count = QuoteRequest.query.filter(QuoteRequest.status == 'quoted').count()
+        quoted_count = stats.quoted_quotes
         conversion_rate = (quoted_count / total_quotes * 100) if total_quotes > 0 else 0
         
         return {
@@ -288,10 +359,17 @@ class Analytics:
             'confirmed_bookings': confirmed_bookings,
             'period_bookings': period_bookings,
             'conversion_rate': round(conversion_rate, 1),
-            'avg_quote_value': Analytics.get_average_quote_value()
+            'avg_quote_value': round((stats.avg_quote_amount or 0) / 100, 2)
         }
     
     @staticmethod
+    def _status_counts(model):
+        """Count rows of `model` per status with a single GROUP BY query"""
+        rows = db.session.query(model.status, func.count(model.id)).group_by(model.status).all()
+        return {status: count for status, count in rows}
+    
+    @staticmethod
+    @_ttl_cached
     def get_revenue_trend(months=6):
         """Get monthly revenue trend"""
         # Ensure months is an integer
@@ -327,6 +405,7 @@ class Analytics:
         ]
     
     @staticmethod
+    @_ttl_cached
     def get_service_popularity():
         """Get most popular services from quotes"""
         service_data = db.session.query(
@@ -342,35 +421,31 @@ class Analytics:
         ]
     
     @staticmethod
+    @_ttl_cached
     def get_quote_conversion_funnel():
         """Get quote conversion funnel data"""
-        total = QuoteRequest.query.count()
-        responded = QuoteRequest.query.filter(QuoteRequest.status == 'responded').count()
-        quoted = QuoteRequest.query.filter(QuoteRequest.status == 'quoted').count()
-        closed = QuoteRequest.query.filter(QuoteRequest.status == 'closed').count()
+        counts = Analytics._status_counts(QuoteRequest)
         
         return {
-            'total': total,
-            'responded': responded,
-            'quoted': quoted,
-            'closed': closed
+            'total': sum(counts.values()),
+            'responded': counts.get('responded', 0),
+            'quoted': counts.get('quoted', 0),
+            'closed': counts.get('closed', 0)
         }
     
     @staticmethod
+    @_ttl_cached
     def get_booking_analytics():
         """Get booking analytics"""
         today = date.today()
         
-        # Upcoming bookings
-        upcoming = Booking.query.filter(
-            and_(Booking.booking_date >= today, Booking.status == 'confirmed')
-        ).count()
-        
-        # This month's bookings
         month_start = today.replace(day=1)
-        this_month = Booking.query.filter(
-            and_(Booking.booking_date >= month_start, Booking.booking_date <= today)
-        ).count()
+        
+        # Upcoming confirmed bookings and this month's bookings in one pass
+        upcoming, this_month = db.session.query(
+            func.count(case((and_(Booking.booking_date >= today, Booking.status == 'confirmed'), 1))),
+            func.count(case((and_(Booking.booking_date >= month_start, Booking.booking_date <= today), 1)))
+        ).one()
         
         # Most popular booking days
         day_popularity = db.session.query(
@@ -391,6 +466,7 @@ class Analytics:
         }
     
     @staticmethod
+    @_ttl_cached
     def get_average_quote_value():
         """Get average quote value"""
         avg_value = db.session.query(
@@ -400,40 +476,42 @@ class Analytics:
         return round((avg_value or 0) / 100, 2)
     
     @staticmethod
+    @_ttl_cached
     def get_recent_activities(limit=10):
         """Get recent system activities"""
-        activities = []
-        
-        # Recent quotes
-        recent_quotes = QuoteRequest.query.order_by(
-            QuoteRequest.created_at.desc()
-        ).limit(5).all()
-        
-        for quote in recent_quotes:
-            activities.append({
-                'type': 'quote',
-                'message': f'New quote request from {quote.name} for {quote.service_type}',
-                'timestamp': quote.created_at,
-                'status': quote.status
-            })
+        # Merge, sort and limit in the database; only `limit` plain rows come back
+        quotes = select(
+            literal('quote').label('type'),
+            QuoteRequest.name.label('name'),
+            QuoteRequest.service_type.label('service_type'),
+            cast(null(), db.Date).label('booking_date'),
+            QuoteRequest.created_at.label('created_at'),
+            QuoteRequest.status.label('status')
+        )
+        bookings = select(
+            literal('booking'),
+            Booking.name,
+            cast(null(), db.String),
+            Booking.booking_date,
+            Booking.created_at,
+            Booking.status
+        )
+        rows = db.session.execute(
+            union_all(quotes, bookings).order_by(desc('created_at')).limit(limit)
+        ).all()
         
-        # Recent bookings
-        recent_bookings = Booking.query.order_by(
-            Booking.created_at.desc()
-        ).limit(5).all()
-        
-        for booking in recent_bookings:
-            activities.append({
-                'type': 'booking',
-                'message': f'New booking from {booking.name} for {booking.date_display}',
-                'timestamp': booking.created_at,
-                'status': booking.status
-            })
-        
-        # Sort by timestamp and limit
-        activities.sort(key=lambda x: x['timestamp'], reverse=True)
-        return activities[:limit]
-
+        return [
+            {
+                'type': row.type,
+                'message': (
+                    f'New quote request from {row.name} for {row.service_type}'
+                    if row.type == 'quote'
+                    else f"New booking from {row.name} for {row.booking_date.strftime('%B %d, %Y')}"
+                ),
+                'timestamp': row.created_at,
+                'status': row.status
+            } for row in rows
+        ]
 
 class Review(db.Model):
     """Customer product reviews"""
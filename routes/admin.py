@@ -1,5 +1,5 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, abort, jsonify, make_response
-from models import Product, Order, QuoteRequest, ServicePackage, Booking, Analytics, Review, db, CORPORATE_CATEGORIES
+from models import Product, Order, OrderItem, QuoteRequest, ServicePackage, Booking, Analytics, Review, db, CORPORATE_CATEGORIES
 from utils.media import save_media
 from config import Config
 import json
@@ -7,6 +7,7 @@ import csv
 from datetime import datetime, date, timedelta
 from io import StringIO
 from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 
 # Import size and frame options for product customization
 SIZE_OPTIONS = {
@@ -217,7 +218,9 @@ def admin_orders():
 @admin_bp.route("/orders/<int:order_id>", methods=["GET", "POST"])
 def order_detail(order_id):
     require_admin()
-    order = Order.query.get_or_404(order_id)
+    order = Order.query.options(
+        selectinload(Order.items).selectinload(OrderItem.product)
+    ).get_or_404(order_id)
 
     if request.method == "POST":
         new_status = request.form.get("status")
@@ -352,6 +355,16 @@ def delete_booking(booking_id):
     return redirect(url_for("admin.bookings"))
 
 # Analytics Routes
+# metric name -> callable(date_range)
+ANALYTICS_METRICS = {
+    'dashboard': lambda date_range: Analytics.get_dashboard_stats(date_range),
+    'revenue-trend': lambda date_range: Analytics.get_revenue_trend(6),
+    'service-popularity': lambda date_range: Analytics.get_service_popularity(),
+    'conversion-funnel': lambda date_range: Analytics.get_quote_conversion_funnel(),
+    'booking-analytics': lambda date_range: Analytics.get_booking_analytics(),
+    'recent-activities': lambda date_range: Analytics.get_recent_activities(10),
+}
+
 @admin_bp.route("/api/analytics/<metric>")
 def analytics_api(metric):
     """API endpoint for real-time analytics data"""
@@ -363,22 +376,11 @@ def analytics_api(metric):
     except (ValueError, TypeError):
         date_range = 30
     
-    if metric == 'dashboard':
-        data = Analytics.get_dashboard_stats(date_range)
-    elif metric == 'revenue-trend':
-        data = Analytics.get_revenue_trend(6)
-    elif metric == 'service-popularity':
-        data = Analytics.get_service_popularity()
-    elif metric == 'conversion-funnel':
-        data = Analytics.get_quote_conversion_funnel()
-    elif metric == 'booking-analytics':
-        data = Analytics.get_booking_analytics()
-    elif metric == 'recent-activities':
-        data = Analytics.get_recent_activities(10)
-    else:
+    handler = ANALYTICS_METRICS.get(metric)
+    if handler is None:
         return jsonify({'error': 'Invalid metric'}), 400
     
-    return jsonify(data)
+    return jsonify(handler(date_range))
 
 @admin_bp.route("/analytics/export")
 def export_analytics():
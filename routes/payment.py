@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify, render_template, redirect, url_fo
 from sqlalchemy.exc import SQLAlchemyError
 from models import db, Order, OrderItem, Product, User
 from utils.dummy_payments import provider as dummy_provider
-from utils.email_service import send_order_confirmation_email, send_payment_failure_email
+from utils.email_service import queue_order_confirmation_email, send_payment_failure_email
 import os
 import stripe
 import logging
@@ -13,6 +13,19 @@ logger = logging.getLogger(__name__)
 
 payment_bp = Blueprint('payment', __name__, url_prefix='/payment')
 
+# Static JSON error bodies for the intent API, serialized once at import
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+_ERR_DUMMY_ONLY = b'{"error":"Only dummy provider implemented"}'
+_ERR_EMAIL_ITEMS_REQUIRED = b'{"error":"email and items are required"}'
+_ERR_INTENT_ID_REQUIRED = b'{"error":"payment_intent_id required"}'
+_ERR_INTENT_NOT_FOUND = b'{"error":"intent_not_found"}'
+
+
+@payment_bp.record_once
+def _configure_stripe(state):
+    """Set the Stripe API key once when the blueprint is registered, not per checkout"""
+    stripe.api_key = state.app.config.get('STRIPE_SECRET_KEY')
+
 
 def using_dummy():
 	return os.getenv('PAYMENTS_PROVIDER', 'dummy').lower() == 'dummy'
@@ -23,13 +36,11 @@ class StripeService:
     
     @staticmethod
     def initialize_stripe():
-        """Initialize Stripe with API keys"""
-        try:
-            stripe.api_key = current_app.config.get('STRIPE_SECRET_KEY')
-            return True
-        except Exception as e:
-            logger.error(f"Failed to initialize Stripe: {e}")
+        """Check that Stripe was configured at blueprint registration"""
+        if not stripe.api_key:
+            logger.error("Failed to initialize Stripe: STRIPE_SECRET_KEY is not set")
             return False
+        return True
     
     @staticmethod
     def create_checkout_session(items, customer_email=None, order_id=None):
@@ -68,7 +79,7 @@ class StripeService:
             }
             
         except Exception as e:
-            logger.error(f"Error creating checkout session: {e}")
+            logger.error("Error creating checkout session: %s", e)
             raise e
 
 
@@ -83,7 +94,7 @@ def create_intent():
 	}
 	"""
 	if not using_dummy():
-		return jsonify({'error': 'Only dummy provider implemented'}), 400
+		return _ERR_DUMMY_ONLY, 400, _JSON_HEADERS
 
 	data = request.get_json(force=True, silent=True) or {}
 	email = data.get('email')
@@ -91,7 +102,7 @@ def create_intent():
 	currency = data.get('currency', 'usd')
 
 	if not email or not items:
-		return jsonify({'error': 'email and items are required'}), 400
+		return _ERR_EMAIL_ITEMS_REQUIRED, 400, _JSON_HEADERS
 
 	# Validate items and compute amount
 	product_map = {}
@@ -149,16 +160,16 @@ def create_intent():
 @payment_bp.route('/confirm', methods=['POST'])
 def confirm_intent():
 	if not using_dummy():
-		return jsonify({'error': 'Only dummy provider implemented'}), 400
+		return _ERR_DUMMY_ONLY, 400, _JSON_HEADERS
 
 	data = request.get_json(force=True, silent=True) or {}
 	intent_id = data.get('payment_intent_id')
 	if not intent_id:
-		return jsonify({'error': 'payment_intent_id required'}), 400
+		return _ERR_INTENT_ID_REQUIRED, 400, _JSON_HEADERS
 
 	intent = dummy_provider.confirm(intent_id)
 	if not intent:
-		return jsonify({'error': 'intent_not_found'}), 404
+		return _ERR_INTENT_NOT_FOUND, 404, _JSON_HEADERS
 
 	# Update associated order status to paid
 	order = Order.query.filter_by(stripe_payment_intent=intent_id).first()
@@ -176,11 +187,11 @@ def confirm_intent():
 @payment_bp.route('/intent/<intent_id>', methods=['GET'])
 def get_intent(intent_id):
 	if not using_dummy():
-		return jsonify({'error': 'Only dummy provider implemented'}), 400
+		return _ERR_DUMMY_ONLY, 400, _JSON_HEADERS
 
 	intent = dummy_provider.retrieve(intent_id)
 	if not intent:
-		return jsonify({'error': 'intent_not_found'}), 404
+		return _ERR_INTENT_NOT_FOUND, 404, _JSON_HEADERS
 
 	return jsonify({'payment_intent': intent.to_dict()})
 
@@ -295,7 +306,7 @@ def create_checkout_session():
         })
 
     except Exception as e:
-        logger.error(f"Error in create_checkout_session: {e}")
+        logger.error("Error in create_checkout_session: %s", e)
         logger.error(traceback.format_exc())
         db.session.rollback()
         return jsonify({'error': 'Failed to create checkout session'}), 500
@@ -353,17 +364,17 @@ def complete_fake_checkout():
             order.stripe_payment_intent = f'pi_fake_{datetime.now().strftime("%Y%m%d%H%M%S")}'
             db.session.commit()
             
-            # Send confirmation email (don't let email failures break the payment process)
-            email_sent = False
+            # Queue confirmation email; delivery happens in the background so the
+            # customer isn't kept waiting on the email service
+            email_queued = False
             try:
-                email_result = send_order_confirmation_email(order)
-                if email_result.get('success'):
-                    logger.info(f"Order confirmation email sent for order {order.id}")
-                    email_sent = True
+                email_queued = queue_order_confirmation_email(order)
+                if email_queued:
+                    logger.info("Order confirmation email queued for order %s", order.id)
                 else:
-                    logger.warning(f"Failed to send confirmation email for order {order.id}: {email_result.get('error')}")
+                    logger.warning("No confirmation email queued for order %s: no valid customer email", order.id)
             except Exception as e:
-                logger.error(f"Error sending confirmation email for order {order.id}: {e}")
+                logger.error("Error queueing confirmation email for order %s: %s", order.id, e)
                 logger.error(traceback.format_exc())
                 # Continue processing - email failure shouldn't break the payment flow
             
@@ -373,8 +384,8 @@ def complete_fake_checkout():
             session.modified = True
             
             # Update success message based on email status
-            if email_sent:
-                flash("Payment successful! A confirmation email has been sent to your email address.", "success")
+            if email_queued:
+                flash("Payment successful! A confirmation email is on its way to your email address.", "success")
             else:
                 flash("Payment successful! Please save your order number for reference. If you don't receive a confirmation email, please contact support.", "success")
             
@@ -389,9 +400,9 @@ def complete_fake_checkout():
             try:
                 email_result = send_payment_failure_email(order, "Payment was declined by the card issuer")
                 if email_result.get('success'):
-                    logger.info(f"Payment failure notification sent for order {order.id}")
+                    logger.info("Payment failure notification sent for order %s", order.id)
             except Exception as e:
-                logger.error(f"Error sending payment failure notification: {e}")
+                logger.error("Error sending payment failure notification: %s", e)
             
             flash("Payment failed. Please check your payment details and try again.", "danger")
             return redirect(url_for('payment.cancel'))
@@ -405,7 +416,7 @@ def complete_fake_checkout():
             return redirect(url_for('payment.cancel'))
             
     except Exception as e:
-        logger.error(f"Error completing fake checkout: {e}")
+        logger.error("Error completing fake checkout: %s", e)
         logger.error(traceback.format_exc())
         db.session.rollback()
         flash("An error occurred during payment processing. Please try again.", "danger")
@@ -425,22 +436,25 @@ def success():
             order_id = int(session_id.split('_')[-1])
             order = db.session.get(Order, order_id)
         except (ValueError, IndexError):
-            logger.warning(f"Could not extract order ID from session_id: {session_id}")
+            logger.warning("Could not extract order ID from session_id: %s", session_id)
     
     if not order:
         # Try to get from session as fallback
         pending_order_id = session.get('pending_order_id')
         if pending_order_id:
             order = db.session.get(Order, pending_order_id)
-            logger.info(f"Found order from session: {order.id}" if order else "No order found in session")
+            if order:
+                logger.info("Found order from session: %s", order.id)
+            else:
+                logger.info("No order found in session")
     
     if order and order.status == 'paid':
         # Ensure order items are loaded (for template display)
         db.session.refresh(order)
-        logger.info(f"Displaying success page for paid order {order.id}")
+        logger.info("Displaying success page for paid order %s", order.id)
         return render_template('payment/success.html', order=order)
     elif order:
-        logger.warning(f"Order {order.id} found but status is {order.status}, not paid")
+        logger.warning("Order %s found but status is %s, not paid", order.id, order.status)
         flash(f"Order found but payment status is {order.status}. Please contact support if you believe this is an error.", "warning")
         return redirect(url_for('public.shop'))
     else:
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash, abort, jsonify
 from models import Product, User, Order, OrderItem, QuoteRequest, ServicePackage, Booking, Availability, Review, db, CORPORATE_CATEGORIES
 from datetime import datetime, date, timedelta, time
+from sqlalchemy.orm import selectinload
 import uuid
 import json
 
@@ -615,7 +616,7 @@ def submit_review(product_id):
     verified_purchase = False
     if user_id:
         # Check if user has an order with this product
-        user_orders = Order.query.filter_by(user_id=user_id).all()
+        user_orders = Order.query.options(selectinload(Order.items)).filter_by(user_id=user_id).all()
         for order in user_orders:
             for item in order.items:
                 if item.product_id == product_id:
@@ -929,8 +930,10 @@ def orders():
         flash("User not found. Please log in again.", "error")
         return redirect(url_for("auth.auth"))
     
-    # Get user's orders
-    user_orders = Order.query.filter_by(user_id=user.id).order_by(Order.created_at.desc()).all()
+    # Get user's orders; items and their products load in one IN query each
+    user_orders = Order.query.options(
+        selectinload(Order.items).selectinload(OrderItem.product)
+    ).filter_by(user_id=user.id).order_by(Order.created_at.desc()).all()
     
     return render_template("orders.html", orders=user_orders)
 
@@ -5,7 +5,10 @@ Local storage implementation for file management
 import os
 import logging
 from flask import Blueprint, request, jsonify, abort, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+from routes.admin import require_admin
 from utils.local_storage import local_storage_service
+from utils.media import allowed_file
 
 logger = logging.getLogger(__name__)
 
@@ -40,16 +43,49 @@ def upload_file():
         )
 
         if success:
-            logger.info(f"File uploaded successfully: {result['filename']}")
+            logger.info("File uploaded successfully: %s", result['filename'])
             return jsonify(result), 200
         else:
-            logger.error(f"File upload failed: {result['error']}")
+            logger.error("File upload failed: %s", result['error'])
             return jsonify(result), 400
 
     except Exception as e:
-        logger.error(f"Unexpected error in upload: {e}")
+        logger.error("Unexpected error in upload: %s", e)
         return jsonify({"error": "Upload failed"}), 500
 
+@upload_bp.route("/upload-batch", methods=["POST"])
+def upload_batch():
+    """Upload several files in one request, saving them concurrently (admin only)"""
+    require_admin()
+    try:
+        files = [f for f in request.files.getlist("files") if f.filename]
+        if not files:
+            return jsonify({"error": "No files provided"}), 400
+
+        max_files = current_app.config["UPLOAD_BATCH_MAX_FILES"]
+        if len(files) > max_files:
+            return jsonify({"error": f"At most {max_files} files per batch"}), 400
+
+        rejected = [f.filename for f in files if not allowed_file(f.filename)]
+        if rejected:
+            return jsonify({"error": "File type not allowed", "files": rejected}), 400
+
+        storage = get_storage()
+        results = storage.upload_many(files)
+
+        uploaded = [result for success, result in results if success]
+        failed = [result for success, result in results if not success]
+        logger.info("Batch upload finished: %s uploaded, %s failed", len(uploaded), len(failed))
+
+        status = 200 if uploaded else 400
+        return jsonify({"uploaded": uploaded, "failed": failed}), status
+
+    except RequestEntityTooLarge:
+        raise
+    except Exception as e:
+        logger.error("Unexpected error in batch upload: %s", e)
+        return jsonify({"error": "Batch upload failed"}), 500
+
 @upload_bp.route("/files", methods=["GET"])
 def list_files():
     """List uploaded files"""
@@ -64,7 +100,7 @@ def list_files():
             return jsonify(result), 400
 
     except Exception as e:
-        logger.error(f"Error listing files: {e}")
+        logger.error("Error listing files: %s", e)
         return jsonify({"error": "Failed to list files"}), 500
 
 @upload_bp.route("/files/<path:blob_name>", methods=["DELETE"])
@@ -75,14 +111,14 @@ def delete_file(blob_name):
         # local storage delete uses simple id; drive service expects blob/file id
         success, result = storage.delete_file(blob_name)
         if success:
-            logger.info(f"File deleted successfully: {blob_name}")
+            logger.info("File deleted successfully: %s", blob_name)
             return jsonify(result), 200
         else:
-            logger.error(f"File deletion failed: {result['error']}")
+            logger.error("File deletion failed: %s", result['error'])
             return jsonify(result), 400
 
     except Exception as e:
-        logger.error(f"Error deleting file {blob_name}: {e}")
+        logger.error("Error deleting file %s: %s", blob_name, e)
         return jsonify({"error": "Delete failed"}), 500
 
 @upload_bp.route("/files/<path:blob_name>/info", methods=["GET"])
@@ -105,7 +141,7 @@ def get_file_info(blob_name):
             return jsonify(result), 400
 
     except Exception as e:
-        logger.error(f"Error getting file info for {blob_name}: {e}")
+        logger.error("Error getting file info for %s: %s", blob_name, e)
         return jsonify({"error": "Failed to get file info"}), 500
 
 @upload_bp.route("/files/<path:blob_name>/download-url", methods=["GET"])
@@ -133,7 +169,7 @@ def generate_download_url(blob_name):
             return jsonify({"error": "Failed to generate download URL"}), 400
 
     except Exception as e:
-        logger.error(f"Error generating download URL for {blob_name}: {e}")
+        logger.error("Error generating download URL for %s: %s", blob_name, e)
         return jsonify({"error": "Failed to generate download URL"}), 500
 
 # Legacy route for backward compatibility
@@ -162,5 +198,5 @@ def upload_file_legacy():
             abort(400, result.get("error", "upload failed"))
 
     except Exception as e:
-        logger.error(f"Legacy upload error: {e}")
+        logger.error("Legacy upload error: %s", e)
         abort(500, "Upload failed")
@@ -0,0 +1,25 @@
+from app import app, db
+from models import Analytics, QuoteRequest
+
+
+def setup_module(module):
+    with app.app_context():
+        db.create_all()
+
+def test_cached_stats_refresh_after_write():
+    with app.app_context():
+        before = Analytics.get_quote_conversion_funnel()
+        assert Analytics.get_quote_conversion_funnel() == before
+
+        quote = QuoteRequest(name='Test Client', email='client@example.com', service_type='Event Photography', status='quoted')
+        db.session.add(quote)
+        db.session.commit()
+
+        after = Analytics.get_quote_conversion_funnel()
+        assert after['total'] == before['total'] + 1
+        assert after['quoted'] == before['quoted'] + 1
+        assert Analytics.get_dashboard_stats(30)['total_quotes'] == after['total']
+
+        db.session.delete(quote)
+        db.session.commit()
+        assert Analytics.get_quote_conversion_funnel() == before
@@ -0,0 +1,39 @@
+import io
+import os
+from app import app
+
+
+def _post_batch(client, *files):
+    data = {'files': [(io.BytesIO(body), name) for name, body in files]}
+    return client.post('/api/upload-batch', data=data, content_type='multipart/form-data')
+
+def _admin_client():
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['admin'] = True
+    return client
+
+def test_batch_upload_requires_admin():
+    resp = _post_batch(app.test_client(), ('photo.png', b'png'))
+    assert resp.status_code == 403
+
+def test_batch_upload_rejects_active_content():
+    resp = _post_batch(_admin_client(), ('photo.png', b'png'), ('page.html', b'<script>alert(1)</script>'), ('icon.svg', b'<svg/>'))
+    assert resp.status_code == 400
+    assert resp.get_json()['files'] == ['page.html', 'icon.svg']
+
+def test_batch_upload_rejects_oversized_body():
+    limit = app.config['MAX_CONTENT_LENGTH']
+    app.config['MAX_CONTENT_LENGTH'] = 1024
+    try:
+        resp = _post_batch(_admin_client(), ('photo.png', b'x' * 4096))
+    finally:
+        app.config['MAX_CONTENT_LENGTH'] = limit
+    assert resp.status_code == 413
+
+def test_batch_upload_stores_allowed_files():
+    resp = _post_batch(_admin_client(), ('photo.png', b'png'))
+    assert resp.status_code == 200, resp.data
+    uploaded = resp.get_json()['uploaded']
+    assert len(uploaded) == 1
+    os.remove(uploaded[0]['local_path'])
@@ -2,13 +2,92 @@
 Email service utility for FlashStudio
 Integrates with Azure Functions EmailNotifications service
 """
+import atexit
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import logging
-from datetime import datetime
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from functools import lru_cache
 from flask import current_app
+from jinja2 import Environment
 
 logger = logging.getLogger(__name__)
 
+# Shared HTTP session so repeated sends reuse the pooled keep-alive connection
+# to the Azure Function instead of paying a TCP+TLS handshake per email
+_http = requests.Session()
+_http.headers.update({'Content-Type': 'application/json'})
+# Retry connection failures and explicit "not processed" statuses only, so a POST
+# that may have reached SendGrid is never re-sent (no duplicate emails)
+_http.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=3,
+        read=0,
+        status=1,
+        backoff_factor=0.5,
+        status_forcelist=(429, 503),
+        allowed_methods=frozenset({'POST'}),
+        # Ignore Retry-After: urllib3 doesn't cap it, and the failure email is sent inside
+        # the checkout request, which must finish within gunicorn's 60 s timeout
+        respect_retry_after_header=False,
+        raise_on_status=False
+    )
+))
+# (connect, read) seconds. Worst case per send: at most 2 attempts reach a read (status=1)
+# and the other retries are connection failures, so 2*15 + 2*5 + 3 s backoff = 43 s,
+# inside gunicorn's 60 s worker timeout
+_TIMEOUT = (5, 15)
+# Drain pooled connections on worker shutdown (queued sends are joined before atexit runs)
+atexit.register(_http.close)
+
+# Cheap shape check so obviously bad addresses never cost an Azure Function/SendGrid round trip
+_EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+# Background sender for emails the request doesn't need to wait on
+_send_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='email-send')
+
+# Email bodies compiled once at import; autoescape keeps interpolated values HTML-safe
+_templates = Environment(autoescape=True, auto_reload=False)
+
+# Whitespace between tags is only there for source readability; drop it before compiling
+_INTER_TAG_WS = re.compile(r'>\s+<')
+
+
+def _compile_minified(source):
+    return _templates.from_string(_INTER_TAG_WS.sub('><', source.strip()))
+
+
+PAYMENT_FAILURE_TPL = _compile_minified("""
+<p>We were unable to process your payment for order <strong>#{{ order_number }}</strong>.</p>
+
+<div style="background: #f8f9fa; padding: 15px; border-radius: 5px; margin: 15px 0;">
+    <p><strong>Order Details:</strong></p>
+    <p>Amount: S$ {{ amount }}</p>
+    <p>Date: {{ order_date }}</p>
+</div>
+
+<p>Please try again or contact our support team if you continue to experience issues.</p>
+
+<p><a href="https://flashstudio.com/cart" style="color: #007bff;">Try Payment Again</a></p>
+""")
+
+
+@lru_cache(maxsize=32)
+def _format_day(ordinal):
+    return date.fromordinal(ordinal).strftime('%B %d, %Y')
+
+
+def _display_date(value=None):
+    """Format a date/datetime (default: today) as 'January 02, 2025', memoized per day"""
+    day = value.date() if isinstance(value, datetime) else (value or date.today())
+    return _format_day(day.toordinal())
+
 
 class EmailService:
     """Service to handle email notifications via Azure Functions"""
@@ -21,6 +100,19 @@ class EmailService:
             'https://flashstudio-functions.azurewebsites.net/api/EmailNotifications'
         )
     
+    @staticmethod
+    def delivery_url():
+        """Function URL to post to, or None in development mode (unset or localhost)"""
+        function_url = EmailService.get_function_url()
+        if not function_url or 'localhost' in function_url:
+            return None
+        return function_url
+    
+    @staticmethod
+    def has_valid_recipient(order):
+        """Check the order has a well-formed customer email to send to"""
+        return bool(order.customer_email and _EMAIL_RE.match(order.customer_email))
+    
     @staticmethod
     def send_order_confirmation(order):
         """
@@ -32,77 +124,48 @@ class EmailService:
         Returns:
             dict: Response from email service
         """
-        try:
-            # Prepare order items data
-            items = []
-            for item in order.items:
-                items.append({
-                    'name': item.product.title if item.product else 'Product',
-                    'price': f"{item.unit_price_cents / 100:.2f}",
-                    'quantity': item.quantity,
-                    'total': f"{(item.unit_price_cents * item.quantity) / 100:.2f}"
-                })
-            
-            # Prepare email data
-            email_data = {
-                'type': 'order_confirmation',
-                'to': order.customer_email,
-                'name': order.user.email.split('@')[0] if order.user else 'Valued Customer',  # Use email prefix as name
-                'order_id': f"ORD{order.id:05d}",
-                'total_amount': f"{order.amount_cents / 100:.2f}",
-                'currency': 'S$',
-                'items': items,
-                'order_date': order.created_at.strftime('%B %d, %Y') if order.created_at else datetime.now().strftime('%B %d, %Y')
-            }
-            
-            # Send email via Azure Function
-            function_url = EmailService.get_function_url()
-            
-            # If no function URL configured, log and return success (for local development)
-            if not function_url or 'localhost' in function_url:
-                logger.warning("Email function URL not configured, skipping email send")
-                return {
-                    'success': True,
-                    'message': 'Email service not configured (development mode)',
-                    'local_dev': True
-                }
-            
-            response = requests.post(
-                function_url,
-                json=email_data,
-                timeout=30,
-                headers={'Content-Type': 'application/json'}
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                logger.info(f"Order confirmation email sent successfully to {order.customer_email}")
-                return result
-            else:
-                logger.error(f"Email service returned status {response.status_code}: {response.text}")
-                return {
-                    'success': False,
-                    'error': f'Email service error: {response.status_code}'
-                }
-                
-        except requests.exceptions.Timeout:
-            logger.error("Email service timeout")
-            return {
-                'success': False,
-                'error': 'Email service timeout'
-            }
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Email service request failed: {e}")
+        if not EmailService.has_valid_recipient(order):
+            return {'success': False, 'error': 'Order has no valid customer email'}
+
+        email_data = EmailService.build_order_confirmation(order)
+        
+        # Send email via Azure Function
+        function_url = EmailService.delivery_url()
+        
+        # If no function URL configured, log and return success (for local development)
+        if not function_url:
+            logger.warning("Email function URL not configured, skipping email send")
             return {
-                'success': False,
-                'error': f'Email service unavailable: {e}'
-            }
-        except Exception as e:
-            logger.error(f"Unexpected error in email service: {e}")
-            return {
-                'success': False,
-                'error': f'Email service error: {e}'
+                'success': True,
+                'message': 'Email service not configured (development mode)',
+                'local_dev': True
             }
+        
+        return _deliver_order_confirmation(function_url, email_data)
+    
+    @staticmethod
+    def build_order_confirmation(order):
+        """Build the order confirmation payload for the Azure Function"""
+        # Prepare order items data
+        items = [
+            {
+                'name': item.product.title if item.product else 'Product',
+                'price': f"{item.unit_price_cents / 100:.2f}",
+                'quantity': item.quantity,
+                'total': f"{(item.unit_price_cents * item.quantity) / 100:.2f}"
+            } for item in order.items
+        ]
+        
+        return {
+            'type': 'order_confirmation',
+            'to': order.customer_email,
+            'name': order.user.email.split('@')[0] if order.user else 'Valued Customer',  # Use email prefix as name
+            'order_id': f"ORD{order.id:05d}",
+            'total_amount': f"{order.amount_cents / 100:.2f}",
+            'currency': 'S$',
+            'items': items,
+            'order_date': _display_date(order.created_at)
+        }
     
     @staticmethod
     def send_payment_failure_notification(order, error_message=None):
@@ -116,47 +179,85 @@ class EmailService:
         Returns:
             dict: Response from email service
         """
+        if not EmailService.has_valid_recipient(order):
+            return {'success': False, 'error': 'Order has no valid customer email'}
+
+        email_data = {
+            'type': 'custom',
+            'to': order.customer_email,
+            'name': order.user.email.split('@')[0] if order.user else 'Customer',
+            'subject': f'Payment Failed for Order #{order.id:05d}',
+            'message': PAYMENT_FAILURE_TPL.render(
+                order_number=f"{order.id:05d}",
+                amount=f"{order.amount_cents / 100:.2f}",
+                order_date=_display_date(order.created_at) if order.created_at else 'Today'
+            )
+        }
+        
+        function_url = EmailService.delivery_url()
+        
+        if not function_url:
+            logger.warning("Email function URL not configured, skipping failure notification")
+            return {'success': True, 'local_dev': True}
+        
         try:
-            email_data = {
-                'type': 'custom',
-                'to': order.customer_email,
-                'name': order.user.email.split('@')[0] if order.user else 'Customer',
-                'subject': f'Payment Failed for Order #{order.id:05d}',
-                'message': f"""
-                <p>We were unable to process your payment for order <strong>#{order.id:05d}</strong>.</p>
-                
-                <div style="background: #f8f9fa; padding: 15px; border-radius: 5px; margin: 15px 0;">
-                    <p><strong>Order Details:</strong></p>
-                    <p>Amount: S$ {order.amount_cents / 100:.2f}</p>
-                    <p>Date: {order.created_at.strftime('%B %d, %Y') if order.created_at else 'Today'}</p>
-                </div>
-                
-                <p>Please try again or contact our support team if you continue to experience issues.</p>
-                
-                <p><a href="https://flashstudio.com/cart" style="color: #007bff;">Try Payment Again</a></p>
-                """
-            }
-            
-            function_url = EmailService.get_function_url()
-            
-            if not function_url or 'localhost' in function_url:
-                logger.warning("Email function URL not configured, skipping failure notification")
-                return {'success': True, 'local_dev': True}
-            
-            response = requests.post(function_url, json=email_data, timeout=30)
+            response = _http.post(function_url, data=orjson.dumps(email_data), timeout=_TIMEOUT)
             
             if response.status_code == 200:
-                logger.info(f"Payment failure notification sent to {order.customer_email}")
-                return response.json()
+                logger.info("Payment failure notification sent to %s", order.customer_email)
+                return orjson.loads(response.content)
             else:
-                logger.error(f"Failed to send payment failure notification: {response.status_code}")
+                logger.error("Failed to send payment failure notification: %s", response.status_code)
                 return {'success': False, 'error': 'Failed to send notification'}
                 
-        except Exception as e:
-            logger.error(f"Error sending payment failure notification: {e}")
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            logger.error("Error sending payment failure notification: %s", e)
             return {'success': False, 'error': str(e)}
 
 
+def _deliver_order_confirmation(function_url, email_data):
+    """POST a prepared order confirmation to the Azure Function"""
+    try:
+        response = _http.post(function_url, data=orjson.dumps(email_data), timeout=_TIMEOUT)
+        
+        if response.status_code == 200:
+            result = orjson.loads(response.content)
+            logger.info("Order confirmation email sent successfully to %s", email_data['to'])
+            return result
+        else:
+            logger.error("Email service returned status %s: %s", response.status_code, response.text)
+            return {
+                'success': False,
+                'error': f'Email service error: {response.status_code}'
+            }
+            
+    except requests.exceptions.Timeout:
+        logger.error("Email service timeout")
+        return {
+            'success': False,
+            'error': 'Email service timeout'
+        }
+    except requests.exceptions.RequestException as e:
+        logger.error("Email service request failed: %s", e)
+        return {
+            'success': False,
+            'error': f'Email service unavailable: {e}'
+        }
+    except orjson.JSONDecodeError as e:
+        logger.error("Email service returned invalid JSON: %s", e)
+        return {
+            'success': False,
+            'error': f'Email service error: {e}'
+        }
+
+
+def _log_send_failure(future):
+    """Log anything a background send raised, since nobody waits on its future"""
+    exc = future.exception()
+    if exc is not None:
+        logger.error("Background email send failed: %s", exc, exc_info=exc)
+
+
 def send_order_confirmation_email(order):
     """
     Convenience function to send order confirmation email
@@ -181,4 +282,32 @@ def send_payment_failure_email(order, error_message=None):
     Returns:
         dict: Response from email service
     """
-    return EmailService.send_payment_failure_notification(order, error_message)
\ No newline at end of file
+    return EmailService.send_payment_failure_notification(order, error_message)
+
+
+def queue_order_confirmation_email(order):
+    """
+    Build the order confirmation now and send it on a background thread
+    
+    The payload is built in the caller's request (it reads the order and its
+    items from the session); only the HTTP round trip is deferred.
+    
+    Args:
+        order: Order object
+        
+    Returns:
+        bool: True if the email was queued (or skipped in development mode)
+    """
+    if not EmailService.has_valid_recipient(order):
+        return False
+    
+    email_data = EmailService.build_order_confirmation(order)
+    function_url = EmailService.delivery_url()
+    
+    if not function_url:
+        logger.warning("Email function URL not configured, skipping email send")
+        return True
+    
+    future = _send_pool.submit(_deliver_order_confirmation, function_url, email_data)
+    future.add_done_callback(_log_send_failure)
+    return True
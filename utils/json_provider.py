@@ -0,0 +1,38 @@
+"""orjson-backed JSON provider for Flask
+
+Drop-in replacement for Flask's DefaultJSONProvider. Output matches the default
+provider (sorted keys, HTTP-date datetimes, compact unless debugging) but the
+encoding is done by orjson and response bodies are written as bytes directly.
+"""
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider using orjson for dumps/loads"""
+
+    # Datetimes are passed through to DefaultJSONProvider.default so they keep
+    # Flask's HTTP-date format instead of orjson's ISO-8601
+    _BASE_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def _options(self, indent=None):
+        option = self._BASE_OPTIONS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(
+            obj, default=self.default, option=self._options(kwargs.get("indent"))
+        ).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent))
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
@@ -1,7 +1,13 @@
+import heapq
 import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.datastructures import FileStorage
 
+# Shared worker pool for batch uploads; bounded so a large batch can't spawn unbounded threads
+UPLOAD_MAX_CONCURRENCY = int(os.getenv("UPLOAD_MAX_CONCURRENCY", 4))
+_upload_pool = ThreadPoolExecutor(max_workers=UPLOAD_MAX_CONCURRENCY, thread_name_prefix="upload")
+
 class LocalStorageService:
     """Simple local filesystem storage for development/testing.
     Stores files under a configured base directory and exposes relative media URLs.
@@ -30,25 +36,36 @@ class LocalStorageService:
         except Exception as e:
             return False, {'error': str(e)}
 
-    def list_files(self, limit=20):
+    def upload_many(self, file_objs):
+        """Upload several files concurrently on the shared upload pool.
+        Returns a list of (success, result) tuples in the same order as file_objs.
+        """
+        return list(_upload_pool.map(self.upload_file, file_objs))
+
+    def list_files(self, folder=None, limit=20):
+        """Newest files first; only the top `limit` entries are ordered, not the whole directory.
+        `folder` is accepted for parity with drive_service; local uploads are stored flat.
+        """
         try:
-            items = []
-            for name in sorted(os.listdir(self.base_dir))[:limit]:
-                items.append({
-                    'id': name,
-                    'name': name,
-                    'public_url': f"/media/{name}"
-                })
+            with os.scandir(self.base_dir) as entries:
+                newest = heapq.nlargest(
+                    limit,
+                    (e for e in entries if e.is_file()),
+                    key=lambda e: e.stat().st_mtime
+                )
+            items = [
+                {'id': e.name, 'name': e.name, 'public_url': f"/media/{e.name}"}
+                for e in newest
+            ]
             return True, {'files': items}
         except Exception as e:
             return False, {'error': str(e)}
 
     def delete_file(self, file_id: str):
         try:
-            path = os.path.join(self.base_dir, file_id)
-            if os.path.exists(path):
-                os.remove(path)
-                return True, {}
+            os.remove(os.path.join(self.base_dir, file_id))
+            return True, {}
+        except FileNotFoundError:
             return False, {'error': 'not_found'}
         except Exception as e:
             return False, {'error': str(e)}
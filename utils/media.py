@@ -4,6 +4,18 @@ from uuid import uuid4
 
 UPLOAD_FOLDER = "static/uploads"
 
+# Extensions accepted from upload forms. Anything a browser would run as
+# active content from /media (e.g. .html, .svg) is deliberately left out.
+ALLOWED_EXTENSIONS = {
+    ".jpg", ".jpeg", ".png", ".gif", ".webp",
+    ".mp4", ".mov", ".m4v", ".webm",
+    ".pdf",
+}
+
+def allowed_file(filename):
+    """True if filename has an extension in ALLOWED_EXTENSIONS"""
+    return os.path.splitext(filename or "")[1].lower() in ALLOWED_EXTENSIONS
+
 def save_media(file):
     """
     Saves an uploaded file to the static/uploads folder.